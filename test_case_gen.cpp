@@ -1,191 +1,218 @@
 #include <algorithm>
-#include <iostream>
+#include <cstdint>
+#include <cstdlib>
+#include <cstring>
 #include <fstream>
-#include <map>
-#include <numeric>
+#include <iostream>
 #include <random>
-#include <set>
-#include <sstream>
+#include <string>
 #include <vector>
 
 using namespace std;
 
-int main() {
-  // Use a seeded random number generator with current time
-  std::random_device rd;  // Used to obtain a seed for the random number engine
-  std::mt19937 gen(rd()); // Seed the generator with a random device
+// Generator parameters, all settable from the command line
+struct Options {
+  long long num_gates = 0;   // 0 picks a random count in [2, 50]
+  int max_gate_width = 10;
+  int max_gate_height = 10;
+  double pin_density = 2.0;  // Expected number of pins per gate
+  int max_fanout = 2;        // Maximum number of pins on one net
+  long long locality = 0;    // Nets only reach gates within this index distance (0 = anywhere)
+  uint64_t seed = 0;
+  bool has_seed = false;
+};
+
+void print_usage(const char *prog) {
+  std::cerr << "Usage: " << prog << " [options] > input.txt\n"
+            << "  --gates N        number of gates (default: random in [2, 50])\n"
+            << "  --max-width W    maximum gate width (default: 10)\n"
+            << "  --max-height H   maximum gate height (default: 10)\n"
+            << "  --pin-density D  expected pins per gate (default: 2)\n"
+            << "  --fanout F       maximum pins on one net, at least 2 (default: 2)\n"
+            << "  --locality L     nets only connect gates at most L indices apart (default: 0, anywhere)\n"
+            << "  --seed S         seed for a reproducible test case (default: random)\n";
+}
+
+bool parse_args(int argc, char **argv, Options &opt) {
+  for (int i = 1; i < argc; i++) {
+    std::string arg = argv[i];
+    if (arg == "-h" || arg == "--help" || i + 1 >= argc)
+      return false;
+
+    const char *value = argv[++i];
+    if (arg == "--gates")
+      opt.num_gates = atoll(value);
+    else if (arg == "--max-width")
+      opt.max_gate_width = atoi(value);
+    else if (arg == "--max-height")
+      opt.max_gate_height = atoi(value);
+    else if (arg == "--pin-density")
+      opt.pin_density = atof(value);
+    else if (arg == "--fanout")
+      opt.max_fanout = atoi(value);
+    else if (arg == "--locality")
+      opt.locality = atoll(value);
+    else if (arg == "--seed") {
+      opt.seed = strtoull(value, nullptr, 10);
+      opt.has_seed = true;
+    } else
+      return false;
+  }
 
-  // Create a distribution for generating random integers in the range [min,
-  // max]
-  std::uniform_int_distribution<> dist(
-      1, 10000000); // Random integers between 1 and 10000000
+  return opt.num_gates == 0 || opt.num_gates >= 2;
+}
 
-  // Variables for storing maximum dimensions and number of gates
-  int max_num_gates = 50; // Example value, you can set it to the actual required value
-  int max_gate_height = 10;
-  int max_gate_width = 10;
-  int max_pin_per_edge_overall = 2;
-
-  int total_pins = 1;
-
-  // Create a stringstream to temporarily store the output
-  bool wire_on_same_gate = true;
-  std::ostringstream output_buffer;
-  int fin_num_gate = 0;
-  int fin_num_pin = 0;
-  int fin_num_wire = 0;
-  
-  while (wire_on_same_gate || total_pins % 2) {
-    // Reset the stringstream to clear its contents
-    output_buffer.str("");
-    output_buffer.clear(); // This resets error flags, but not the buffer. We
-                           // reset the buffer above.
-
-    total_pins = 0;
-    int num_gates = 1 + dist(gen) % max_num_gates;
-    std::vector<int> num_pin_on_gate(
-        num_gates); // Store pin count for each gate
-
-    for (int gate_idx = 1; gate_idx <= num_gates; gate_idx++) {
-      int gate_height = 1 + dist(gen) % max_gate_height;
-      int gate_width = 1 + dist(gen) % max_gate_width;
-
-      output_buffer << 'g' << gate_idx << " " << gate_width << " "
-                    << gate_height << std::endl;
-
-      int first_pin_cond = dist(gen) % 4;
-      set<pair<int, int>> pins;
-
-      if (first_pin_cond == 0)
-        pins.insert({0, dist(gen) % (gate_height + 1)});
-      else if (first_pin_cond == 1)
-        pins.insert({dist(gen) % (gate_width + 1), 0});
-      else if (first_pin_cond == 2)
-        pins.insert({gate_width, dist(gen) % (gate_height + 1)});
-      else
-        pins.insert({dist(gen) % (gate_width + 1), gate_height});
-
-      int num_pin = 1;
-
-      // Add pins to different edges
-      int max_pin_per_edge = min(gate_width, min(gate_height, 1 + dist(gen) % max_pin_per_edge_overall));
-      int pin_on_edge = dist(gen) % max_pin_per_edge;
-      for (int pin_idx = 0; pin_idx < pin_on_edge;)
-        if (pins.insert({0, dist(gen) % (gate_height + 1)}).second == true) {
-          pin_idx++;
-          num_pin++;
-        }
-
-      pin_on_edge = dist(gen) % max_pin_per_edge;
-      for (int pin_idx = 0; pin_idx < pin_on_edge;)
-        if (pins.insert({dist(gen) % (gate_width + 1), 0}).second == true) {
-          pin_idx++;
-          num_pin++;
-        }
-
-      pin_on_edge = dist(gen) % max_pin_per_edge;
-      for (int pin_idx = 0; pin_idx < pin_on_edge;)
-        if (pins.insert({gate_width, dist(gen) % (gate_height + 1)}).second ==
-            true) {
-          pin_idx++;
-          num_pin++;
-        }
-
-      pin_on_edge = dist(gen) % max_pin_per_edge;
-      for (int pin_idx = 0; pin_idx < pin_on_edge;)
-        if (pins.insert({dist(gen) % (gate_width + 1), gate_height}).second ==
-            true) {
-          pin_idx++;
-          num_pin++;
-        }
-
-      num_pin_on_gate[gate_idx - 1] = num_pin;
-
-      output_buffer << "pins g" << gate_idx << " ";
-      for (auto x : pins)
-        output_buffer << x.first << " " << x.second << " ";
-      output_buffer << std::endl;
-
-      total_pins += num_pin;
-    }
+int main(int argc, char **argv) {
+  Options opt;
+  if (!parse_args(argc, argv, opt) || opt.max_gate_width < 1 ||
+      opt.max_gate_height < 1 || opt.pin_density <= 0 || opt.max_fanout < 2 ||
+      opt.locality < 0) {
+    print_usage(argv[0]);
+    return 1;
+  }
 
-    if (total_pins % 2) {
-      continue; // If odd number of pins, go to next iteration
+  // Without an explicit seed, pick one and report it so the case can be regenerated
+  if (!opt.has_seed)
+    opt.seed = std::random_device{}();
+  std::cerr << "Seed: " << opt.seed << std::endl;
+  std::mt19937_64 gen(opt.seed);
+
+  if (opt.num_gates == 0)
+    opt.num_gates = std::uniform_int_distribution<long long>(2, 50)(gen);
+  long long num_gates = opt.num_gates;
+  long long radius =
+      (opt.locality > 0 && opt.locality < num_gates) ? opt.locality : num_gates;
+
+  // Step 1: Build the nets before any gate is written, so every pin gets used
+  // exactly once and no net touches the same gate twice. A net is stored as its
+  // driver gate followed by its sink gates.
+  std::vector<int> num_pin_on_gate(num_gates, 0);
+  std::vector<int> net_gates;
+  std::vector<size_t> net_start(1, 0);
+
+  double nets_per_gate = opt.pin_density / ((2.0 + opt.max_fanout) / 2.0);
+  int whole_nets = (int)nets_per_gate;
+  std::uniform_real_distribution<double> unit(0.0, 1.0);
+  std::uniform_int_distribution<int> net_size_dist(2, opt.max_fanout);
+
+  for (long long gate_idx = 0; gate_idx < num_gates; gate_idx++) {
+    int num_nets = whole_nets + (unit(gen) < nets_per_gate - whole_nets);
+    if (num_nets == 0 && num_pin_on_gate[gate_idx] == 0)
+      num_nets = 1; // Every gate gets at least one pin
+
+    // Sinks are drawn from the other gates within the locality window
+    long long lo = std::max(0LL, gate_idx - radius);
+    long long hi = std::min(num_gates - 1, gate_idx + radius);
+    std::uniform_int_distribution<long long> sink_dist(lo, hi - 1);
+
+    for (int net = 0; net < num_nets; net++) {
+      long long net_size = std::min<long long>(net_size_dist(gen), hi - lo + 1);
+      size_t first = net_gates.size();
+
+      net_gates.push_back(gate_idx);
+      num_pin_on_gate[gate_idx]++;
+      while ((long long)(net_gates.size() - first) < net_size) {
+        long long sink = sink_dist(gen);
+        if (sink >= gate_idx)
+          sink++; // Skip over the driver's own gate
+        if (std::find(net_gates.begin() + first, net_gates.end(), sink) !=
+            net_gates.end())
+          continue;
+        net_gates.push_back(sink);
+        num_pin_on_gate[sink]++;
+      }
+      net_start.push_back(net_gates.size());
     }
+  }
 
-    // Step 1: Create a sorted set in descending order of the gates and their
-    // pin counts
-    set<pair<int, int>, greater<pair<int, int>>> pin_gate_pair;
-    for (int i = 0; i < num_gates; i++) {
-      pin_gate_pair.insert({num_pin_on_gate[i], i});
+  // Step 2: Stream the gates, growing any gate whose boundary is too short for
+  // its pins, and place the pins on distinct boundary points
+  std::ios::sync_with_stdio(false);
+  std::uniform_int_distribution<int> width_dist(1, opt.max_gate_width);
+  std::uniform_int_distribution<int> height_dist(1, opt.max_gate_height);
+  std::vector<int> chosen;
+  long long total_pins = 0;
+
+  for (long long gate_idx = 0; gate_idx < num_gates; gate_idx++) {
+    int gate_width = width_dist(gen);
+    int gate_height = height_dist(gen);
+    int num_pin = num_pin_on_gate[gate_idx];
+    while (2 * (gate_width + gate_height) < num_pin) {
+      if (gate_width <= gate_height)
+        gate_width++;
+      else
+        gate_height++;
     }
 
-    // Map to track which pin number we're currently at for each gate
-    map<int, int> start_pin;
-    for (int i = 1; i <= num_gates; i++)
-      start_pin[i] = 0; // Start counting pins from 0 (increment before use)
-
-    // Step 2: Ensure the largest gate does not have more than half the total
-    // pins
-    if (pin_gate_pair.begin()->first > total_pins / 2) {
-      wire_on_same_gate = true;
-    //   cout << "Wire on same gate (too many pins in one gate)" << endl;
-      continue; // Too many pins in one gate, retry
-    } else {
-      wire_on_same_gate = false;
+    std::cout << 'g' << gate_idx + 1 << ' ' << gate_width << ' ' << gate_height
+              << '\n';
+
+    // Floyd's sampling of num_pin distinct positions along the perimeter
+    int perimeter = 2 * (gate_width + gate_height);
+    chosen.clear();
+    for (int j = perimeter - num_pin; j < perimeter; j++) {
+      int t = std::uniform_int_distribution<int>(0, j)(gen);
+      if (std::find(chosen.begin(), chosen.end(), t) != chosen.end())
+        t = j;
+      chosen.push_back(t);
     }
+    std::sort(chosen.begin(), chosen.end());
+
+    std::cout << "pins g" << gate_idx + 1 << ' ';
+    for (int t : chosen) {
+      // Walk the boundary counter-clockwise: bottom, right, top, left edge
+      int x, y;
+      if (t < gate_width) {
+        x = t;
+        y = 0;
+      } else if ((t -= gate_width) < gate_height) {
+        x = gate_width;
+        y = t;
+      } else if ((t -= gate_height) < gate_width) {
+        x = gate_width - t;
+        y = gate_height;
+      } else {
+        t -= gate_width;
+        x = 0;
+        y = gate_height - t;
+      }
+      std::cout << x << ' ' << y << ' ';
+    }
+    std::cout << '\n';
 
-    // Step 3: Pair pins between gates
-    while (!pin_gate_pair.empty()) {
-      // Take the largest gate (it1)
-      auto it1 = pin_gate_pair.begin();
-      int gate_idx1 = it1->second + 1; // Gate indices are 1-based
-      int num_pins1 = it1->first;
-      pin_gate_pair.erase(it1); // Remove from set
-
-      // Take the smallest gate (it2)
-      auto it2 = prev(pin_gate_pair.end());
-      int gate_idx2 = it2->second + 1; // Gate indices are 1-based
-      int num_pins2 = it2->first;
-      pin_gate_pair.erase(it2); // Remove from set
-
-      // Increment and output the pin connections (use start_pin before
-      // incrementing)
-      output_buffer << "wire g" << gate_idx1 << ".p" << ++start_pin[gate_idx1]
-                    << " g" << gate_idx2 << ".p" << ++start_pin[gate_idx2]
-                    << endl;
-
-      // Decrement pin counts and reinsert into the set if they have pins left
-      num_pins1--;
-      num_pins2--;
-      if (num_pins1 > 0)
-        pin_gate_pair.insert({num_pins1, gate_idx1 - 1});
-      if (num_pins2 > 0)
-        pin_gate_pair.insert({num_pins2, gate_idx2 - 1});
-    }    std::ofstream outgugu("temp.txt");
-    fin_num_gate = num_gates;
-    fin_num_pin = total_pins;
-    fin_num_wire = total_pins / 2;
-
-    // Check if the file is open
-    if (outgugu.is_open()) {
-        // Write the values to the file
-        outgugu << "Number of Gates: " << fin_num_gate << std::endl;
-        outgugu << "Number of Pins: " << fin_num_pin << std::endl;
-        outgugu << "Number of Wires: " << fin_num_wire << std::endl;
-
-        // Close the file after writing
-        outgugu.close();
-    } else {
-        std::cerr << "Unable to open file temp.txt" << std::endl;
+    total_pins += num_pin;
+  }
+
+  // Step 3: Stream the wires, connecting each net's driver pin to every sink
+  // and numbering pins on each gate in the order they are used
+  std::vector<int> next_pin(num_gates, 0);
+  long long total_wires = 0;
+  for (size_t net = 0; net + 1 < net_start.size(); net++) {
+    int driver = net_gates[net_start[net]];
+    int driver_pin = ++next_pin[driver];
+    for (size_t k = net_start[net] + 1; k < net_start[net + 1]; k++) {
+      int sink = net_gates[k];
+      std::cout << "wire g" << driver + 1 << ".p" << driver_pin << " g"
+                << sink + 1 << ".p" << ++next_pin[sink] << '\n';
+      total_wires++;
     }
+  }
+  std::cout.flush();
+
+  std::ofstream outgugu("temp.txt");
+
+  // Check if the file is open
+  if (outgugu.is_open()) {
+      // Write the values to the file
+      outgugu << "Number of Gates: " << num_gates << std::endl;
+      outgugu << "Number of Pins: " << total_pins << std::endl;
+      outgugu << "Number of Wires: " << total_wires << std::endl;
 
-    // Write the contents of the stringstream to input.txt
-    //std::ofstream input_file("input.txt");
-    std::cout << output_buffer.str();
-    
-    break;
+      // Close the file after writing
+      outgugu.close();
+  } else {
+      std::cerr << "Unable to open file temp.txt" << std::endl;
   }
 
   return 0;
-}
\ No newline at end of file
+}
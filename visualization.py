@@ -49,16 +49,14 @@ def parse_output(data):
             gate_positions[gate_name] = {"x": x, "y": y}
     return gate_positions
 
-# Function to create a connection matrix between pins
-def create_connection_matrix(wires, pin_names):
+# Function to create a sparse list of connections between pins
+def create_connection_list(wires, pin_names):
     # Create a lookup from pin name to index
     pin_lookup = {name: idx for idx, name in enumerate(pin_names)}
     
-    # Initialize connection matrix
-    n = len(pin_names)
-    connection_matrix = [[False for _ in range(n)] for _ in range(n)]
+    # Each connection is stored once as an (i, j) pair with i < j
+    connections = set()
     
-    # Fill the connection matrix
     for wire_from, wire_to in wires:
         from_name = f"{wire_from[0]}.p{wire_from[1][1:]}"
         to_name = f"{wire_to[0]}.p{wire_to[1][1:]}"
@@ -68,11 +66,47 @@ def create_connection_matrix(wires, pin_names):
             from_idx = pin_lookup[from_name]
             to_idx = pin_lookup[to_name]
             
-            # Set the connection in the matrix
-            connection_matrix[from_idx][to_idx] = True
-            connection_matrix[to_idx][from_idx] = True  # Bidirectional
+            # A pin wired to itself has nothing to draw
+            if from_idx != to_idx:
+                connections.add((min(from_idx, to_idx), max(from_idx, to_idx)))
     
-    return connection_matrix
+    return sorted(connections)
+
+# Uniform grid over layout coordinates, used to find the gates and wire
+# segments inside the viewport without scanning the whole design
+class SpatialIndex:
+    def __init__(self, cell_size):
+        self.cell_size = max(1, cell_size)
+        self.cells = {}
+    
+    def cell_range(self, x1, y1, x2, y2):
+        cs = self.cell_size
+        return (math.floor(min(x1, x2) / cs), math.floor(min(y1, y2) / cs),
+                math.floor(max(x1, x2) / cs), math.floor(max(y1, y2) / cs))
+    
+    def insert(self, item, x1, y1, x2, y2):
+        cx1, cy1, cx2, cy2 = self.cell_range(x1, y1, x2, y2)
+        for cx in range(cx1, cx2 + 1):
+            for cy in range(cy1, cy2 + 1):
+                self.cells.setdefault((cx, cy), []).append(item)
+    
+    def query(self, x1, y1, x2, y2):
+        cx1, cy1, cx2, cy2 = self.cell_range(x1, y1, x2, y2)
+        found = set()
+        
+        if (cx2 - cx1 + 1) * (cy2 - cy1 + 1) > len(self.cells):
+            # The rectangle covers more cells than are occupied, so walk the occupied ones
+            for (cx, cy), items in self.cells.items():
+                if cx1 <= cx <= cx2 and cy1 <= cy <= cy2:
+                    found.update(items)
+        else:
+            for cx in range(cx1, cx2 + 1):
+                for cy in range(cy1, cy2 + 1):
+                    items = self.cells.get((cx, cy))
+                    if items:
+                        found.update(items)
+        
+        return found
 
 # Generate a visually distinct color
 def generate_random_color():
@@ -87,12 +121,37 @@ def generate_random_color():
     # Convert to hex format
     return f'#{int(r*255):02x}{int(g*255):02x}{int(b*255):02x}'
 
+MARGIN = 50  # Margin in pixels around the layout
+WIRE_WIDTH = 6  # Consistent width for all wires
+WIRE_ALPHA = 150  # Alpha transparency (0-255, where 0 is fully transparent, 255 is opaque)
+MAX_DETAIL_GATES = 5000  # Beyond this many visible gates, draw aggregated density blocks
+MAX_DETAIL_WIRES = 20000  # Beyond this many visible wires, draw them one pixel wide
+LOD_BLOCK_PX = 12  # Size in pixels of an aggregated density block
+REDRAW_DELAY_MS = 30  # Coalesce scroll and resize events before redrawing
+
 class GateVisualizer(Tk):
-    def __init__(self, gate_dimensions, gate_positions, pins, bounding_box, connection_matrix, pin_names, pin_coordinates):
+    def __init__(self, gate_dimensions, gate_positions, pins, bounding_box, connections, pin_names, pin_coordinates):
         super().__init__()
         
         self.title("Gate Placement Visualization")
         
+        self.gate_dimensions = gate_dimensions
+        self.gate_positions = gate_positions
+        self.pins = pins
+        self.bounding_box = bounding_box
+        self.connections = connections
+        self.pin_names = pin_names
+        self.pin_coordinates = pin_coordinates
+        self.redraw_job = None
+        
+        # Give every wire a fixed color so it does not change while panning
+        self.wire_colors = []
+        for _ in connections:
+            color = generate_random_color()
+            self.wire_colors.append((int(color[1:3], 16), int(color[3:5], 16), int(color[5:7], 16)))
+        
+        self.build_spatial_index()
+        
         # Get screen dimensions
         screen_width = self.winfo_screenwidth()
         screen_height = self.winfo_screenheight()
@@ -113,10 +172,6 @@ class GateVisualizer(Tk):
         self.frame = Frame(self)
         self.frame.pack(fill=BOTH, expand=True)
         
-        # Create canvas with scrollbars
-        self.canvas_width = max(canvas_width, int(bounding_box[0] * self.scale * 1.2))
-        self.canvas_height = max(canvas_height, int(bounding_box[1] * self.scale * 1.2))
-        
         # Create horizontal and vertical scrollbars
         h_scrollbar = Scrollbar(self.frame, orient=HORIZONTAL)
         v_scrollbar = Scrollbar(self.frame)
@@ -130,22 +185,83 @@ class GateVisualizer(Tk):
                              xscrollcommand=h_scrollbar.set, yscrollcommand=v_scrollbar.set)
         self.canvas.pack(side=LEFT, fill=BOTH, expand=True)
         
-        # Configure the scrollbars
-        h_scrollbar.config(command=self.canvas.xview)
-        v_scrollbar.config(command=self.canvas.yview)
+        # Configure the scrollbars; only the visible part is drawn, so scrolling triggers a redraw
+        h_scrollbar.config(command=self.on_xscroll)
+        v_scrollbar.config(command=self.on_yscroll)
         
-        # Set the scrollregion
-        self.canvas.config(scrollregion=(0, 0, self.canvas_width, self.canvas_height))
+        # Drag with the left mouse button to pan, and redraw when the window is resized
+        self.canvas.bind("<ButtonPress-1>", lambda event: self.canvas.scan_mark(event.x, event.y))
+        self.canvas.bind("<B1-Motion>", self.on_drag)
+        self.canvas.bind("<Configure>", lambda event: self.schedule_redraw())
         
-        # Draw the gates, pins, and wires
-        self.draw_everything(gate_dimensions, gate_positions, pins, connection_matrix, pin_names, pin_coordinates)
+        # Set the scrollregion
+        self.update_scrollregion()
         
         # Create a legend
         self.create_legend()
         
+        # Draw the gates, pins, and wires
+        self.draw_everything()
+        
         # Add zoom controls
         self.create_zoom_controls()
     
+    def build_spatial_index(self):
+        # Pick a cell size that puts roughly a couple of gates in each cell
+        num_gates = max(1, len(self.gate_positions))
+        area = max(1, self.bounding_box[0] * self.bounding_box[1])
+        cell_size = 2 * math.ceil(math.sqrt(area / num_gates))
+        
+        self.gate_index = SpatialIndex(cell_size)
+        for gate_name, position in self.gate_positions.items():
+            if gate_name in self.gate_dimensions:
+                x, y = position["x"], position["y"]
+                self.gate_index.insert(gate_name, x, y,
+                                       x + self.gate_dimensions[gate_name]["width"],
+                                       y + self.gate_dimensions[gate_name]["height"])
+        
+        # Wires are routed vertically then horizontally; index each segment separately
+        self.wire_index = SpatialIndex(cell_size)
+        for k, (i, j) in enumerate(self.connections):
+            start_x, start_y = self.pin_coordinates[i]
+            end_x, end_y = self.pin_coordinates[j]
+            self.wire_index.insert(k, start_x, start_y, start_x, end_y)
+            self.wire_index.insert(k, start_x, end_y, end_x, end_y)
+    
+    def update_scrollregion(self):
+        canvas_width = max(self.canvas.winfo_reqwidth(), self.canvas.winfo_width())
+        canvas_height = max(self.canvas.winfo_reqheight(), self.canvas.winfo_height())
+        self.canvas_width = max(canvas_width, int(self.bounding_box[0] * self.scale * 1.2) + 2 * MARGIN)
+        self.canvas_height = max(canvas_height, int(self.bounding_box[1] * self.scale * 1.2) + 2 * MARGIN)
+        self.canvas.config(scrollregion=(0, 0, self.canvas_width, self.canvas_height))
+    
+    def visible_area(self):
+        # Visible rectangle in canvas pixel coordinates
+        width = self.canvas.winfo_width()
+        height = self.canvas.winfo_height()
+        if width <= 1 or height <= 1:  # Not mapped yet, fall back to the requested size
+            width = self.canvas.winfo_reqwidth()
+            height = self.canvas.winfo_reqheight()
+        x0 = self.canvas.canvasx(0)
+        y0 = self.canvas.canvasy(0)
+        return x0, y0, x0 + width, y0 + height
+    
+    def on_xscroll(self, *args):
+        self.canvas.xview(*args)
+        self.schedule_redraw()
+    
+    def on_yscroll(self, *args):
+        self.canvas.yview(*args)
+        self.schedule_redraw()
+    
+    def on_drag(self, event):
+        self.canvas.scan_dragto(event.x, event.y, gain=1)
+        self.schedule_redraw()
+    
+    def schedule_redraw(self):
+        if self.redraw_job is None:
+            self.redraw_job = self.after(REDRAW_DELAY_MS, self.redraw)
+    
     def create_zoom_controls(self):
         zoom_frame = Frame(self)
         zoom_frame.pack(side=BOTTOM, fill=X)
@@ -160,11 +276,25 @@ class GateVisualizer(Tk):
         reset_btn.pack(side=LEFT, padx=5, pady=5)
     
     def zoom_in(self):
-        self.scale *= 1.2
-        self.redraw()
+        self.set_scale(self.scale * 1.2)
     
     def zoom_out(self):
-        self.scale /= 1.2
+        self.set_scale(self.scale / 1.2)
+    
+    def set_scale(self, scale):
+        # Keep the layout point at the centre of the view fixed while zooming
+        x0, y0, x1, y1 = self.visible_area()
+        center_x = ((x0 + x1) / 2 - MARGIN) / self.scale
+        center_y = ((y0 + y1) / 2 - MARGIN) / self.scale
+        
+        self.scale = scale
+        self.update_scrollregion()
+        
+        left = MARGIN + center_x * self.scale - (x1 - x0) / 2
+        top = MARGIN + center_y * self.scale - (y1 - y0) / 2
+        self.canvas.xview_moveto(max(0, left) / self.canvas_width)
+        self.canvas.yview_moveto(max(0, top) / self.canvas_height)
+        
         self.redraw()
     
     def reset_zoom(self):
@@ -172,28 +302,31 @@ class GateVisualizer(Tk):
         canvas_width = self.canvas.winfo_width()
         canvas_height = self.canvas.winfo_height()
         
-        if hasattr(self, 'bounding_box') and self.bounding_box:
+        if self.bounding_box:
             scale_x = canvas_width / self.bounding_box[0]
             scale_y = canvas_height / self.bounding_box[1]
             self.scale = min(scale_x, scale_y) * 0.85
         else:
             self.scale = 30
-            
+        
+        self.update_scrollregion()
+        self.canvas.xview_moveto(0)
+        self.canvas.yview_moveto(0)
         self.redraw()
     
     def redraw(self):
-        # Store the current bounding box
-        if hasattr(self, 'gate_dimensions') and hasattr(self, 'gate_positions'):
-            self.canvas.delete("all")
-            self.draw_everything(self.gate_dimensions, self.gate_positions, self.pins, 
-                                self.connection_matrix, self.pin_names, self.pin_coordinates)
-            self.create_legend()
+        if self.redraw_job is not None:
+            self.after_cancel(self.redraw_job)
+            self.redraw_job = None
+        self.canvas.delete("content")
+        self.update_scrollregion()
+        self.draw_everything()
     
     def create_legend(self):
         # Create a legend frame in the top-right corner
         legend_frame = Frame(self.canvas, bg="white", bd=1, relief=SOLID)
-        legend_window = self.canvas.create_window(self.canvas_width - 150, 20, 
-                                                anchor=NE, window=legend_frame)
+        self.legend_window = self.canvas.create_window(self.canvas_width - 150, 20, 
+                                                       anchor=NE, window=legend_frame)
         
         # Add legend title
         legend_title = Label(legend_frame, text="Legend", font=("Arial", 10, "bold"), bg="white")
@@ -246,130 +379,126 @@ class GateVisualizer(Tk):
         # overlap_label = Label(overlap_frame, text="Overlapping Wires", bg="white", anchor=W)
         # overlap_label.pack(side=LEFT, padx=5)   
 
-    def draw_everything(self, gate_dimensions, gate_positions, pins, connection_matrix, pin_names, pin_coordinates):
-        # Store parameters for redrawing
-        self.gate_dimensions = gate_dimensions
-        self.gate_positions = gate_positions
-        self.pins = pins
-        self.connection_matrix = connection_matrix
-        self.pin_names = pin_names
-        self.pin_coordinates = pin_coordinates
+    def draw_everything(self):
+        x0, y0, x1, y1 = self.visible_area()
         
-        # Calculate the bounding box
-        self.bounding_box = calculate_bounding_box(gate_dimensions, gate_positions)
+        # Keep the legend pinned to the top-right corner of the view
+        self.canvas.coords(self.legend_window, x1 - 20, y0 + 20)
         
-        margin = 50  # Margin in pixels
-        gate_pin_positions = {gate: [] for gate in gate_positions}
+        # Visible rectangle in layout coordinates
+        view = ((x0 - MARGIN) / self.scale, (y0 - MARGIN) / self.scale,
+                (x1 - MARGIN) / self.scale, (y1 - MARGIN) / self.scale)
         
-        # Create a PIL image for drawing transparent wires
-        self.wire_image = Image.new("RGBA", (self.canvas_width, self.canvas_height), (0, 0, 0, 0))
-        self.wire_draw = ImageDraw.Draw(self.wire_image)
+        visible_gates = self.gate_index.query(*view)
+        if len(visible_gates) > MAX_DETAIL_GATES:
+            self.draw_gate_density(visible_gates)
+        else:
+            self.draw_gates(visible_gates)
         
-        # Draw gates with their pins
-        for gate_name, position in gate_positions.items():
-            if gate_name in gate_dimensions:
-                gate_width = gate_dimensions[gate_name]["width"]
-                gate_height = gate_dimensions[gate_name]["height"]
-                
-                # Scale the coordinates
-                x = margin + position["x"] * self.scale
-                y = margin + position["y"] * self.scale
-                width = gate_width * self.scale
-                height = gate_height * self.scale
-                
-                # Draw the gate
-                self.canvas.create_rectangle(
-                    x, y, x + width, y + height, 
-                    fill="lightblue", outline="black", width=2
-                )
-                
-                # Add the gate name
+        self.draw_wires(self.wire_index.query(*view), x0, y0, x1, y1,
+                        detailed=len(visible_gates) <= MAX_DETAIL_GATES)
+    
+    def draw_gates(self, visible_gates):
+        for gate_name in visible_gates:
+            position = self.gate_positions[gate_name]
+            gate_width = self.gate_dimensions[gate_name]["width"]
+            gate_height = self.gate_dimensions[gate_name]["height"]
+            
+            # Scale the coordinates
+            x = MARGIN + position["x"] * self.scale
+            y = MARGIN + position["y"] * self.scale
+            width = gate_width * self.scale
+            height = gate_height * self.scale
+            
+            # Draw the gate
+            self.canvas.create_rectangle(
+                x, y, x + width, y + height, 
+                fill="lightblue", outline="black", width=2, tags="content"
+            )
+            
+            # Add the gate name when there is room for it
+            if width >= 16 and height >= 10:
                 self.canvas.create_text(
                     x + width/2, y + height/2, 
-                    text=gate_name, font=("Arial", max(8, int(self.scale/5)))
+                    text=gate_name, font=("Arial", max(8, int(self.scale/5))), tags="content"
                 )
+            
+            # Draw pins if available
+            if gate_name in self.pins:
+                pin_size = max(3, min(5, self.scale / 10))
                 
-                # Draw pins if available
-                if gate_name in pins:
-                    pin_size = max(3, min(5, self.scale / 10))
-                    
-                    for i, (px_rel, py_rel) in enumerate(pins[gate_name]):
-                        # Convert relative pin coordinates to absolute coordinates
-                        px = x + px_rel * self.scale
-                        py = y + py_rel * self.scale
-                        
-                        # Draw pin with a white center for better visibility
-                        self.canvas.create_oval(px - pin_size, py - pin_size, 
-                                                px + pin_size, py + pin_size, 
-                                                fill="black", outline="black")
-                        self.canvas.create_oval(px - pin_size/2, py - pin_size/2, 
-                                                px + pin_size/2, py + pin_size/2, 
-                                                fill="white", outline="black")
-                        
-                        # Add pin number for clearer identification
-                        if self.scale > 15:  # Only show numbers if scale is large enough
-                            self.canvas.create_text(px, py + pin_size + 8,
-                                                  text=f"p{i+1}", font=("Arial", 7))
-                        
-                        # Store the scaled pin position
-                        gate_pin_positions[gate_name].append((px, py, f"{gate_name}.p{i+1}"))
-        
-        # Generate all wire connections
-        all_wires = []
-        
-        for i in range(len(connection_matrix)):
-            for j in range(i+1, len(connection_matrix[i])):  # Only process each wire once (i < j)
-                if connection_matrix[i][j]:
-                    # Get the pin coordinates
-                    start_x, start_y = pin_coordinates[i]
-                    end_x, end_y = pin_coordinates[j]
-                    
-                    # Scale the coordinates
-                    start_x = margin + start_x * self.scale
-                    start_y = margin + start_y * self.scale
-                    end_x = margin + end_x * self.scale
-                    end_y = margin + end_y * self.scale
+                for i, (px_rel, py_rel) in enumerate(self.pins[gate_name]):
+                    # Convert relative pin coordinates to absolute coordinates
+                    px = x + px_rel * self.scale
+                    py = y + py_rel * self.scale
                     
-                    # Calculate the intermediate point for horizontal-then-vertical routing
-                    mid_x = start_x
-                    mid_y = end_y
+                    # Draw pin with a white center for better visibility
+                    self.canvas.create_oval(px - pin_size, py - pin_size, 
+                                            px + pin_size, py + pin_size, 
+                                            fill="black", outline="black", tags="content")
+                    self.canvas.create_oval(px - pin_size/2, py - pin_size/2, 
+                                            px + pin_size/2, py + pin_size/2, 
+                                            fill="white", outline="black", tags="content")
                     
-                    # Store the wire with its two segments
-                    wire = {
-                        'segments': [
-                            (start_x, start_y, mid_x, mid_y),
-                            (mid_x, mid_y, end_x, end_y)
-                        ],
-                        'pins': (pin_names[i], pin_names[j])  # Store connected pin names for reference
-                    }
-                    all_wires.append(wire)
-        
-        # Draw all wires with unique colors and transparency
-        WIRE_WIDTH = 6  # Consistent width for all wires
-        WIRE_ALPHA = 150  # Alpha transparency (0-255, where 0 is fully transparent, 255 is opaque)
-        
-        for wire in all_wires:
-            # Generate a random color for this wire
-            color = generate_random_color()
+                    # Add pin number for clearer identification
+                    if self.scale > 15:  # Only show numbers if scale is large enough
+                        self.canvas.create_text(px, py + pin_size + 8,
+                                              text=f"p{i+1}", font=("Arial", 7), tags="content")
+    
+    def draw_gate_density(self, visible_gates):
+        # Zoomed out too far to draw gates one by one: count gates per screen block
+        # and shade each block by how full it is
+        block = LOD_BLOCK_PX / self.scale
+        counts = {}
+        for gate_name in visible_gates:
+            position = self.gate_positions[gate_name]
+            center_x = position["x"] + self.gate_dimensions[gate_name]["width"] / 2
+            center_y = position["y"] + self.gate_dimensions[gate_name]["height"] / 2
+            key = (int(center_x // block), int(center_y // block))
+            counts[key] = counts.get(key, 0) + 1
+        
+        max_count = max(counts.values())
+        for (bx, by), count in counts.items():
+            # Interpolate from light blue to dark blue as the block fills up
+            t = count / max_count
+            r, g, b = colorsys.hsv_to_rgb(0.58, 0.25 + 0.75 * t, 0.95 - 0.45 * t)
+            x = MARGIN + bx * LOD_BLOCK_PX
+            y = MARGIN + by * LOD_BLOCK_PX
+            self.canvas.create_rectangle(
+                x, y, x + LOD_BLOCK_PX, y + LOD_BLOCK_PX,
+                fill=f'#{int(r*255):02x}{int(g*255):02x}{int(b*255):02x}', outline="", tags="content"
+            )
+    
+    def draw_wires(self, visible_wires, x0, y0, x1, y1, detailed):
+        # Create a PIL image covering only the view for drawing transparent wires
+        wire_image = Image.new("RGBA", (max(1, int(x1 - x0)), max(1, int(y1 - y0))), (0, 0, 0, 0))
+        wire_draw = ImageDraw.Draw(wire_image)
+        
+        if detailed and len(visible_wires) <= MAX_DETAIL_WIRES:
+            width, alpha = WIRE_WIDTH, WIRE_ALPHA
+        else:
+            width, alpha = 1, 255
+        
+        for k in visible_wires:
+            i, j = self.connections[k]
             
-            # Convert hex to RGB
-            r = int(color[1:3], 16)
-            g = int(color[3:5], 16)
-            b = int(color[5:7], 16)
+            # Scale the coordinates relative to the top-left corner of the view
+            start_x = MARGIN + self.pin_coordinates[i][0] * self.scale - x0
+            start_y = MARGIN + self.pin_coordinates[i][1] * self.scale - y0
+            end_x = MARGIN + self.pin_coordinates[j][0] * self.scale - x0
+            end_y = MARGIN + self.pin_coordinates[j][1] * self.scale - y0
             
-            # Draw each segment of this wire with the same color and transparency
-            for segment in wire['segments']:
-                x1, y1, x2, y2 = segment
-                # Draw on the PIL image with transparency
-                self.wire_draw.line(
-                    [(x1, y1), (x2, y2)], 
-                    fill=(r, g, b, WIRE_ALPHA), 
-                    width=WIRE_WIDTH
-                )
+            # Route vertically first, then horizontally
+            r, g, b = self.wire_colors[k]
+            wire_draw.line(
+                [(start_x, start_y), (start_x, end_y), (end_x, end_y)], 
+                fill=(r, g, b, alpha), 
+                width=width
+            )
         
         # Convert the PIL image to a PhotoImage and display it on the canvas
-        self.wire_tk_image = ImageTk.PhotoImage(self.wire_image)
-        self.canvas.create_image(0, 0, image=self.wire_tk_image, anchor="nw")
+        self.wire_tk_image = ImageTk.PhotoImage(wire_image)
+        self.canvas.create_image(x0, y0, image=self.wire_tk_image, anchor="nw", tags="content")
 
 def calculate_bounding_box(gate_dimensions, gate_positions):
     max_x, max_y = 0, 0
@@ -421,15 +550,15 @@ def main():
                     pin_coordinates.append((px_abs, py_abs))
                     pin_names.append(f"{gate_name}.p{i+1}")
         
-        # Create connection matrix
-        connection_matrix = create_connection_matrix(wires, pin_names)
+        # Create the list of pin connections
+        connections = create_connection_list(wires, pin_names)
         
         # Calculate bounding box
         bounding_box = calculate_bounding_box(gate_dimensions, gate_positions)
         
         # Launch visualization
         app = GateVisualizer(gate_dimensions, gate_positions, pins, bounding_box, 
-                           connection_matrix, pin_names, pin_coordinates)
+                           connections, pin_names, pin_coordinates)
         app.mainloop()
         
     except FileNotFoundError as e: